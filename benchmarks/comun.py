@@ -0,0 +1,51 @@
+# Utilidades compartidas por los scripts de benchmarks
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+# Importa la aplicación apuntando a la base indicada; DATABASE_URL se lee al importar app.py
+def importar_app(url=None):
+    if url:
+        os.environ['DATABASE_URL'] = url
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    import app
+    return app
+
+
+# Pico de memoria residente en MB. En Linux se usa VmHWM, que puede reiniciarse entre rutas y
+# leerse también de otro proceso (por ejemplo un worker de gunicorn); en otros sistemas, el pico
+# del proceso actual (o None si no se puede medir).
+def rss_pico_mb(pid='self'):
+    try:
+        with open(f'/proc/{pid}/status') as estado:
+            for linea in estado:
+                if linea.startswith('VmHWM:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid != 'self':
+        return None
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def reiniciar_rss_pico(pid='self'):
+    try:
+        with open(f'/proc/{pid}/clear_refs', 'w') as archivo:
+            archivo.write('5')
+    except OSError:
+        pass
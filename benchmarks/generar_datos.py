@@ -0,0 +1,106 @@
+# Generador de datos sintéticos reproducibles (con semilla) para los benchmarks. Llena las
+# tablas cliente y factura a la escala pedida, desde mil hasta millones de facturas, y crea
+# el usuario con el que los benchmarks inician sesión.
+#
+#   python benchmarks/generar_datos.py --facturas 100000 --url sqlite:////tmp/bench.db
+#   python benchmarks/generar_datos.py --facturas 10000000 --clientes 50000 --url postgresql+psycopg2://...
+#
+# Los datos se agregan a los existentes, así que conviene usar una base dedicada.
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from comun import importar_app
+
+NOMBRES = ['Ana', 'Carlos', 'Lucia', 'Jorge', 'Maria', 'Pedro', 'Sofia', 'Diego', 'Valeria', 'Andres',
+           'Camila', 'Luis', 'Daniela', 'Miguel', 'Paula', 'Javier', 'Elena', 'Ricardo', 'Gabriela', 'Pablo']
+APELLIDOS = ['Garcia', 'Rodriguez', 'Martinez', 'Lopez', 'Gonzalez', 'Perez', 'Sanchez', 'Ramirez', 'Torres',
+             'Flores', 'Rivera', 'Gomez', 'Diaz', 'Cruz', 'Morales', 'Reyes', 'Mantilla', 'Vargas', 'Castro', 'Ortiz']
+USUARIO = 'benchmark'
+PASSWORD = 'Benchmark#2024'
+
+
+def generar_clientes(aleatorio, cantidad, desplazamiento):
+    for i in range(desplazamiento, desplazamiento + cantidad):
+        nombre = aleatorio.choice(NOMBRES)
+        apellido = aleatorio.choice(APELLIDOS)
+        yield {
+            'nombre': f'{nombre} {apellido}',
+            'email': f'{nombre}.{apellido}{i}@ejemplo.com'.lower(),
+            'telefono': f'09{aleatorio.randrange(10 ** 8):08d}',
+        }
+
+
+# Unos pocos clientes concentran la mayoría de las facturas, como en datos reales
+def generar_facturas(aleatorio, cantidad, primer_cliente, ultimo_cliente, desde, dias):
+    total_clientes = ultimo_cliente - primer_cliente + 1
+    for _ in range(cantidad):
+        yield {
+            'cliente_id': primer_cliente + int(total_clientes * aleatorio.random() ** 3),
+            'fecha': desde + timedelta(days=aleatorio.randrange(dias)),
+            'monto': Decimal(int(aleatorio.lognormvariate(9, 1.2)) + 100).scaleb(-2),
+        }
+
+
+def insertar_en_lotes(db, tabla, filas, lote, etiqueta):
+    inicio = time.perf_counter()
+    total = 0
+    pendientes = []
+    for fila in filas:
+        pendientes.append(fila)
+        if len(pendientes) == lote:
+            db.session.execute(tabla.insert(), pendientes)
+            db.session.commit()
+            total += len(pendientes)
+            pendientes = []
+            print(f'{etiqueta}: {total} ({total / (time.perf_counter() - inicio):.0f} filas/s)', flush=True)
+    if pendientes:
+        db.session.execute(tabla.insert(), pendientes)
+        db.session.commit()
+        total += len(pendientes)
+    print(f'{etiqueta}: {total} filas en {time.perf_counter() - inicio:.1f} s', flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera clientes y facturas sintéticos.')
+    parser.add_argument('--url', help='DATABASE_URL de la base a llenar (por defecto la de la aplicación).')
+    parser.add_argument('--facturas', type=int, default=1000)
+    parser.add_argument('--clientes', type=int, help='Por defecto una centésima parte de las facturas (mínimo 10).')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--desde', type=date.fromisoformat, default=date(2020, 1, 1), help='Fecha de la primera factura.')
+    parser.add_argument('--dias', type=int, default=4 * 365, help='Días que abarcan las facturas.')
+    parser.add_argument('--lote', type=int, default=50000, help='Filas por transacción.')
+    args = parser.parse_args()
+
+    aplicacion = importar_app(args.url)
+    app, db, Cliente, Factura, Usuario = (
+        aplicacion.app, aplicacion.db, aplicacion.Cliente, aplicacion.Factura, aplicacion.Usuario
+    )
+    aleatorio = random.Random(args.semilla)
+    clientes = args.clientes or max(10, args.facturas // 100)
+
+    with app.app_context():
+        primer_cliente = (db.session.query(db.func.max(Cliente.id)).scalar() or 0) + 1
+        insertar_en_lotes(db, Cliente.__table__, generar_clientes(aleatorio, clientes, primer_cliente),
+                          args.lote, 'Clientes')
+        ultimo_cliente = db.session.query(db.func.max(Cliente.id)).scalar()
+        insertar_en_lotes(db, Factura.__table__, generar_facturas(
+            aleatorio, args.facturas, primer_cliente, ultimo_cliente, args.desde, args.dias
+        ), args.lote, 'Facturas')
+
+        # Los inserts en bloque no pasan por los eventos del ORM: los resúmenes se recalculan al final
+        with db.engine.begin() as conn:
+            aplicacion.reconstruir_resumenes(conn)
+
+        if not Usuario.query.filter_by(username=USUARIO).first():
+            db.session.add(Usuario(username=USUARIO, password=aplicacion.hash_password(PASSWORD)))
+            db.session.commit()
+        maximo_factura = db.session.query(db.func.max(Factura.id)).scalar()
+    print(f'Listo. Clientes {primer_cliente}-{ultimo_cliente}, facturas hasta el id {maximo_factura}. '
+          f'Usuario de benchmarks: {USUARIO} / {PASSWORD}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+# Benchmark de las rutas principales (listados, búsqueda de clientes, PDF y reportes).
+# Reporta latencia p50/p95/p99, peticiones por segundo, consultas SQL por petición y pico de
+# memoria de cada ruta, y puede compararse con una ejecución anterior para detectar regresiones.
+#
+# Modo "cliente": la aplicación se importa en este proceso y se usa el test client de Flask.
+#   python benchmarks/generar_datos.py --facturas 100000 --url sqlite:////tmp/bench.db
+#   python benchmarks/rutas.py --url sqlite:////tmp/bench.db --salida base.json
+#   python benchmarks/rutas.py --url sqlite:////tmp/bench.db --base base.json   # sale con 1 si hay regresión
+#
+# Modo "http": varios hilos contra un servidor ya levantado (gunicorn, flask run...). Las
+# consultas SQL se toman de /metrics y la memoria de los PID indicados, si están en esta máquina.
+#   python benchmarks/rutas.py --modo http --servidor http://localhost:8000 --hilos 16 \
+#       --max-factura-id 100000 --max-cliente-id 1000 --pid 1234 --pid 1235
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from comun import importar_app, percentil, reiniciar_rss_pico, rss_pico_mb
+from generar_datos import APELLIDOS, PASSWORD, USUARIO
+
+# (nombre, endpoint de Flask, plantilla de la ruta)
+RUTAS = [
+    ('facturas', 'listar_facturas', '/facturas'),
+    ('facturas_cliente', 'listar_facturas', '/facturas?cliente_id={cliente}'),
+    ('facturas_fechas', 'listar_facturas', '/facturas?fecha_desde={desde}&fecha_hasta={hasta}'),
+    ('facturas_montos', 'listar_facturas', '/facturas?monto_minimo={minimo}&monto_maximo={maximo}'),
+    ('clientes', 'listar_clientes', '/clientes?pagina={pagina}'),
+    ('clientes_busqueda', 'listar_clientes', '/clientes?q={texto}'),
+    ('clientes_sugerencias', 'buscar_clientes_json', '/clientes/buscar?q={texto}'),
+    ('generar_pdf', 'generar_pdf', '/facturas/generar_pdf/{factura}'),
+    ('reportes', 'reportes', '/reportes'),
+]
+
+
+def construir_ruta(plantilla, aleatorio, max_factura, max_cliente):
+    desde = date(2020, 1, 1) + timedelta(days=aleatorio.randrange(4 * 365))
+    minimo = aleatorio.randrange(10, 500)
+    return plantilla.format(
+        cliente=aleatorio.randint(1, max_cliente),
+        factura=aleatorio.randint(1, max_factura),
+        desde=desde.isoformat(),
+        hasta=(desde + timedelta(days=30)).isoformat(),
+        minimo=minimo,
+        maximo=minimo + 50,
+        pagina=aleatorio.randint(1, 20),
+        texto=urllib.parse.quote(aleatorio.choice(APELLIDOS)[:4]),
+    )
+
+
+def resumir(latencias, duracion, consultas, errores, rss_mb):
+    return {
+        'peticiones': len(latencias),
+        'errores': errores,
+        'p50_ms': round(percentil(latencias, 50) * 1000, 2),
+        'p95_ms': round(percentil(latencias, 95) * 1000, 2),
+        'p99_ms': round(percentil(latencias, 99) * 1000, 2),
+        'peticiones_por_segundo': round(len(latencias) / duracion, 1),
+        'consultas_por_peticion': round(consultas, 2) if consultas is not None else None,
+        'rss_pico_mb': round(rss_mb, 1) if rss_mb is not None else None,
+    }
+
+
+# Las peticiones se hacen en este proceso, una tras otra
+def medir_con_cliente(args, rutas):
+    aplicacion = importar_app(args.url)
+    app, db = aplicacion.app, aplicacion.db
+    app.config['PDF_CACHE_DIR'] = tempfile.mkdtemp(prefix='bench_pdf_')
+    aplicacion.limiter.enabled = False
+
+    with app.app_context():
+        max_factura = args.max_factura_id or db.session.query(db.func.max(aplicacion.Factura.id)).scalar()
+        max_cliente = args.max_cliente_id or db.session.query(db.func.max(aplicacion.Cliente.id)).scalar()
+    if not max_factura:
+        sys.exit('La base no tiene facturas: ejecuta antes benchmarks/generar_datos.py')
+
+    consultas = [0]
+    def contar_consulta(*_):
+        consultas[0] += 1
+    with app.app_context():
+        event.listen(db.engine, 'after_cursor_execute', contar_consulta)
+
+    cliente = app.test_client()
+    cliente.post('/login', data={'username': USUARIO, 'password': PASSWORD}, base_url='https://localhost')
+    if cliente.get('/facturas', base_url='https://localhost').status_code != 200:
+        sys.exit(f'No se pudo iniciar sesión como {USUARIO}: ejecuta antes benchmarks/generar_datos.py')
+
+    aleatorio = random.Random(args.semilla)
+    resultados = {}
+    for nombre, _, plantilla in rutas:
+        for _ in range(args.calentamiento):
+            cliente.get(construir_ruta(plantilla, aleatorio, max_factura, max_cliente), base_url='https://localhost')
+
+        latencias = []
+        errores = 0
+        consultas[0] = 0
+        reiniciar_rss_pico()
+        inicio_ruta = time.perf_counter()
+        for _ in range(args.peticiones):
+            ruta = construir_ruta(plantilla, aleatorio, max_factura, max_cliente)
+            inicio = time.perf_counter()
+            respuesta = cliente.get(ruta, base_url='https://localhost')
+            respuesta.get_data()
+            latencias.append(time.perf_counter() - inicio)
+            respuesta.close()
+            if respuesta.status_code >= 400:
+                errores += 1
+        duracion = time.perf_counter() - inicio_ruta
+        resultados[nombre] = resumir(latencias, duracion, consultas[0] / args.peticiones, errores, rss_pico_mb())
+    return resultados
+
+
+class SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def iniciar_sesion_http(servidor):
+    datos = urllib.parse.urlencode({'username': USUARIO, 'password': PASSWORD}).encode()
+    abridor = urllib.request.build_opener(SinRedirecciones)
+    try:
+        respuesta = abridor.open(f'{servidor}/login', datos)
+    except urllib.error.HTTPError as redireccion:
+        respuesta = redireccion
+    cookies = [c.split(';', 1)[0] for c in respuesta.headers.get_all('Set-Cookie') or []]
+    if respuesta.status != 302 or not cookies:
+        sys.exit(f'No se pudo iniciar sesión como {USUARIO} en {servidor}')
+    return '; '.join(cookies)
+
+
+# Suma y cantidad del histograma de consultas SQL por endpoint, leídos de /metrics
+def leer_consultas_sql(servidor, token):
+    peticion = urllib.request.Request(f'{servidor}/metrics')
+    if token:
+        peticion.add_header('Authorization', f'Bearer {token}')
+    try:
+        with urllib.request.urlopen(peticion) as respuesta:
+            texto = respuesta.read().decode()
+    except urllib.error.URLError:
+        return None
+    totales = {}
+    for linea in texto.splitlines():
+        for sufijo in ('_sum', '_count'):
+            prefijo = f'http_peticion_consultas_sql{sufijo}{{endpoint="'
+            if linea.startswith(prefijo):
+                endpoint, valor = linea[len(prefijo):].split('"} ')
+                totales[endpoint, sufijo] = float(valor)
+    return totales
+
+
+def medir_con_http(args, rutas):
+    if not args.max_factura_id or not args.max_cliente_id:
+        sys.exit('En modo http hay que indicar --max-factura-id y --max-cliente-id')
+    servidor = args.servidor.rstrip('/')
+    cookie = iniciar_sesion_http(servidor)
+
+    def pedir(ruta):
+        peticion = urllib.request.Request(servidor + ruta, headers={'Cookie': cookie})
+        try:
+            with urllib.request.urlopen(peticion) as respuesta:
+                respuesta.read()
+                return respuesta.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+    resultados = {}
+    for indice, (nombre, endpoint, plantilla) in enumerate(rutas):
+        aleatorio = random.Random(args.semilla + indice)
+        for _ in range(args.calentamiento):
+            pedir(construir_ruta(plantilla, aleatorio, args.max_factura_id, args.max_cliente_id))
+
+        # Cada hilo tiene su propio generador; el contador compartido reparte las peticiones
+        restantes = iter(range(args.peticiones))
+        candado = threading.Lock()
+        latencias = []
+        errores = [0]
+
+        def trabajar(semilla):
+            aleatorio_hilo = random.Random(semilla)
+            while True:
+                with candado:
+                    if next(restantes, None) is None:
+                        return
+                ruta = construir_ruta(plantilla, aleatorio_hilo, args.max_factura_id, args.max_cliente_id)
+                inicio = time.perf_counter()
+                estado = pedir(ruta)
+                duracion = time.perf_counter() - inicio
+                with candado:
+                    latencias.append(duracion)
+                    if estado >= 400:
+                        errores[0] += 1
+
+        antes = leer_consultas_sql(servidor, args.token_metricas)
+        for pid in args.pid:
+            reiniciar_rss_pico(pid)
+        hilos = [threading.Thread(target=trabajar, args=(args.semilla * 1000 + indice * 100 + i,))
+                 for i in range(args.hilos)]
+        inicio_ruta = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio_ruta
+        despues = leer_consultas_sql(servidor, args.token_metricas)
+
+        consultas = None
+        if antes is not None and despues is not None:
+            cantidad = despues.get((endpoint, '_count'), 0) - antes.get((endpoint, '_count'), 0)
+            if cantidad:
+                consultas = (despues[endpoint, '_sum'] - antes.get((endpoint, '_sum'), 0)) / cantidad
+        memoria = [rss_pico_mb(pid) for pid in args.pid]
+        rss_mb = sum(memoria) if memoria and None not in memoria else None
+        resultados[nombre] = resumir(latencias, duracion, consultas, errores[0], rss_mb)
+    return resultados
+
+
+# Una ruta empeora si su p95 supera el de la base más la tolerancia o si hace más consultas
+def comparar(resultados, base, tolerancia):
+    regresiones = []
+    for nombre, actual in resultados.items():
+        anterior = base.get(nombre)
+        if not anterior:
+            continue
+        if actual['p95_ms'] > anterior['p95_ms'] * (1 + tolerancia):
+            regresiones.append(f"{nombre}: p95 {anterior['p95_ms']} -> {actual['p95_ms']} ms")
+        if None not in (actual['consultas_por_peticion'], anterior['consultas_por_peticion']) \
+                and actual['consultas_por_peticion'] > anterior['consultas_por_peticion']:
+            regresiones.append(f"{nombre}: consultas por petición "
+                               f"{anterior['consultas_por_peticion']} -> {actual['consultas_por_peticion']}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de las rutas de la aplicación.')
+    parser.add_argument('--modo', choices=('cliente', 'http'), default='cliente')
+    parser.add_argument('--url', help='DATABASE_URL para el modo cliente (por defecto la de la aplicación).')
+    parser.add_argument('--servidor', default='http://localhost:5000', help='URL del servidor en modo http.')
+    parser.add_argument('--hilos', type=int, default=8, help='Hilos concurrentes en modo http.')
+    parser.add_argument('--pid', type=int, action='append', default=[],
+                        help='PID de un proceso del servidor para medir su memoria (modo http, repetible).')
+    parser.add_argument('--token-metricas', help='METRICAS_TOKEN del servidor, si /metrics lo exige.')
+    parser.add_argument('--peticiones', type=int, default=200, help='Peticiones medidas por ruta.')
+    parser.add_argument('--calentamiento', type=int, default=5, help='Peticiones sin medir antes de cada ruta.')
+    parser.add_argument('--rutas', help='Nombres de rutas separados por comas (por defecto todas).')
+    parser.add_argument('--max-factura-id', type=int)
+    parser.add_argument('--max-cliente-id', type=int)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados.')
+    parser.add_argument('--base', help='Resultados JSON anteriores con los que comparar.')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='Aumento de p95 admitido frente a la base.')
+    args = parser.parse_args()
+
+    rutas = RUTAS
+    if args.rutas:
+        elegidas = args.rutas.split(',')
+        rutas = [ruta for ruta in RUTAS if ruta[0] in elegidas]
+    resultados = medir_con_cliente(args, rutas) if args.modo == 'cliente' else medir_con_http(args, rutas)
+
+    for nombre, r in resultados.items():
+        print(f"{nombre:22} p50/p95/p99={r['p50_ms']}/{r['p95_ms']}/{r['p99_ms']} ms"
+              f"  {r['peticiones_por_segundo']:>8} pet/s  consultas={r['consultas_por_peticion']}"
+              f"  rss={r['rss_pico_mb']} MB  errores={r['errores']}")
+
+    if args.salida:
+        with open(args.salida, 'w') as archivo:
+            json.dump({'modo': args.modo, 'rutas': resultados}, archivo, indent=2)
+
+    if args.base:
+        with open(args.base) as archivo:
+            regresiones = comparar(resultados, json.load(archivo)['rutas'], args.tolerancia)
+        for regresion in regresiones:
+            print(f'REGRESIÓN {regresion}')
+        if regresiones:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()